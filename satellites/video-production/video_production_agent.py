@@ -6,7 +6,8 @@ This agent generates finished MP4 videos from repository-provided scripts using
 a fully automated, local-first workflow.
 
 Usage:
-    python video_production_agent.py
+    python video_production_agent.py            # Render all matching scripts
+    python video_production_agent.py --verify   # Verify rendered MP4s in VIDEO_OUT_DIR
 
 Environment Variables:
     REPO_ROOT: Absolute path to repository (default: current directory)
@@ -27,8 +28,9 @@ import sys
 import glob
 import re
 import subprocess
-import json
+import struct
 import logging
+from array import array
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
@@ -69,6 +71,11 @@ SUBTITLE_FONT_SIZE = 36
 TITLE_Y_OFFSET = -50
 SUBTITLE_Y_OFFSET = 50
 
+# Output verification
+SYNC_TOLERANCE_SECONDS = 0.5  # Allowed drift between streams / planned timeline (AAC priming, frame rounding)
+MP4_CONTAINER_BOXES = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+MP4_HANDLER_KINDS = {b'vide': 'video', b'soun': 'audio'}
+
 
 @dataclass
 class Scene:
@@ -90,10 +97,246 @@ class VideoJob:
     audio_path: Optional[Path] = None
     total_duration: float = 0.0
     fallbacks_used: List[str] = None
+    verification_issues: List[str] = None
     
     def __post_init__(self):
         if self.fallbacks_used is None:
             self.fallbacks_used = []
+        if self.verification_issues is None:
+            self.verification_issues = []
+
+
+@dataclass
+class StreamInfo:
+    """Represents a single track read from an MP4 container"""
+    track_id: int
+    kind: str
+    codec: str
+    duration_seconds: float
+    sample_count: int
+    size_bytes: int
+
+
+@dataclass
+class MediaInfo:
+    """Represents container-level metadata read from an MP4 file"""
+    path: Path
+    duration_seconds: float
+    size_bytes: int
+    mdat_bytes: int
+    streams: List[StreamInfo]
+    
+    def stream(self, kind: str) -> Optional[StreamInfo]:
+        """Return the first stream of the given kind ('video' or 'audio')"""
+        for stream in self.streams:
+            if stream.kind == kind:
+                return stream
+        return None
+
+
+def _iter_boxes(f, start: int, end: int):
+    """
+    Yield MP4 boxes between two file offsets without reading their payloads
+    
+    Args:
+        f: Binary file object
+        start: Offset of the first box header
+        end: Offset where the enclosing box (or file) ends
+        
+    Yields:
+        Tuples of (box type, payload offset, box end offset)
+        
+    Raises:
+        ValueError: If a box header is invalid or a box runs past `end`
+    """
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) < 8:
+            raise ValueError(f"Box header at offset {offset} runs past end of file")
+        size, box_type = struct.unpack('>I4s', header)
+        header_size = 8
+        if size == 1:
+            large_size = f.read(8)
+            if len(large_size) < 8:
+                raise ValueError(f"Box header at offset {offset} runs past end of file")
+            size = struct.unpack('>Q', large_size)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size:
+            raise ValueError(f"Invalid {box_type!r} box size {size} at offset {offset}")
+        if offset + size > end:
+            raise ValueError(
+                f"{box_type!r} box at offset {offset} is truncated: "
+                f"{size} bytes declared, {end - offset} available"
+            )
+        yield box_type, offset + header_size, offset + size
+        offset += size
+
+
+def _read_payload(f, offset: int, end: int, limit: int = 64) -> bytes:
+    """Read up to `limit` bytes of a box payload"""
+    f.seek(offset)
+    return f.read(min(end - offset, limit))
+
+
+def _parse_timing(payload: bytes) -> Tuple[int, int]:
+    """
+    Parse timescale and duration from an mvhd or mdhd payload
+    
+    Returns:
+        Tuple of (timescale, duration)
+    """
+    if payload[0] == 1:
+        return struct.unpack_from('>IQ', payload, 20)
+    return struct.unpack_from('>II', payload, 12)
+
+
+def _parse_stsz(f, offset: int, end: int) -> Tuple[int, int]:
+    """
+    Parse sample count and total payload size from an stsz box
+    
+    Returns:
+        Tuple of (sample count, total size in bytes)
+    """
+    sample_size, sample_count = struct.unpack_from('>II', _read_payload(f, offset, end, 12), 4)
+    if sample_size:
+        return sample_count, sample_size * sample_count
+    
+    data = _read_payload(f, offset + 12, end, sample_count * 4)
+    if len(data) < sample_count * 4:
+        raise ValueError(f"stsz table holds fewer than {sample_count} entries")
+    sizes = array('I')
+    sizes.frombytes(data)
+    if sys.byteorder == 'little':
+        sizes.byteswap()
+    return sample_count, sum(sizes)
+
+
+def _parse_trak(f, offset: int, end: int) -> Optional[StreamInfo]:
+    """Parse a trak box into a StreamInfo, reading only the leaf boxes needed"""
+    track_id = 0
+    kind = ''
+    codec = ''
+    timescale = 0
+    duration = 0
+    sample_count = 0
+    size_bytes = 0
+    
+    pending = [(offset, end)]
+    while pending:
+        start, stop = pending.pop()
+        for box_type, payload, box_end in _iter_boxes(f, start, stop):
+            if box_type in MP4_CONTAINER_BOXES:
+                pending.append((payload, box_end))
+            elif box_type == b'tkhd':
+                data = _read_payload(f, payload, box_end)
+                track_id = struct.unpack_from('>I', data, 20 if data[0] == 1 else 12)[0]
+            elif box_type == b'mdhd':
+                timescale, duration = _parse_timing(_read_payload(f, payload, box_end))
+            elif box_type == b'hdlr':
+                handler = _read_payload(f, payload, box_end)[8:12]
+                kind = MP4_HANDLER_KINDS.get(handler, handler.decode('latin-1'))
+            elif box_type == b'stsd':
+                codec = _read_payload(f, payload, box_end, 16)[12:16].decode('latin-1')
+            elif box_type == b'stsz':
+                sample_count, size_bytes = _parse_stsz(f, payload, box_end)
+    
+    if not timescale:
+        return None
+    
+    return StreamInfo(
+        track_id=track_id,
+        kind=kind,
+        codec=codec,
+        duration_seconds=duration / timescale,
+        sample_count=sample_count,
+        size_bytes=size_bytes
+    )
+
+
+def read_mp4_info(path: Path) -> Optional[MediaInfo]:
+    """
+    Read duration, codec and size metadata from an MP4 file in-process
+    
+    Walks the box tree with seeks, skipping mdat entirely, so only a few small
+    reads are needed per file regardless of its size.
+    
+    Args:
+        path: Path to MP4 file
+        
+    Returns:
+        MediaInfo, or None if the file is missing, truncated, damaged or has
+        no moov box
+    """
+    try:
+        file_size = path.stat().st_size
+        with open(path, 'rb') as f:
+            timescale = duration = mdat_bytes = 0
+            streams = []
+            for box_type, payload, box_end in _iter_boxes(f, 0, file_size):
+                if box_type == b'mdat':
+                    mdat_bytes += box_end - payload
+                elif box_type == b'moov':
+                    for child_type, child_payload, child_end in _iter_boxes(f, payload, box_end):
+                        if child_type == b'mvhd':
+                            timescale, duration = _parse_timing(_read_payload(f, child_payload, child_end))
+                        elif child_type == b'trak':
+                            stream = _parse_trak(f, child_payload, child_end)
+                            if stream:
+                                streams.append(stream)
+        
+        if not timescale:
+            return None
+        
+        return MediaInfo(
+            path=path,
+            duration_seconds=duration / timescale,
+            size_bytes=file_size,
+            mdat_bytes=mdat_bytes,
+            streams=streams
+        )
+    except (OSError, struct.error, IndexError, ValueError) as e:
+        logger.debug(f"Could not read MP4 metadata from {path}: {e}")
+    
+    return None
+
+
+def read_wav_duration(path: Path) -> Optional[float]:
+    """
+    Read the duration of a PCM WAV file from its RIFF header
+    
+    Args:
+        path: Path to WAV file
+        
+    Returns:
+        Duration in seconds, or None if the file is missing or not a WAV
+    """
+    try:
+        file_size = path.stat().st_size
+        with open(path, 'rb') as f:
+            riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+            if riff != b'RIFF' or wave != b'WAVE':
+                return None
+            
+            byte_rate = 0
+            offset = 12
+            while offset + 8 <= file_size:
+                f.seek(offset)
+                chunk_id, chunk_size = struct.unpack('<4sI', f.read(8))
+                if chunk_id == b'fmt ':
+                    byte_rate = struct.unpack('<HHII', f.read(12))[3]
+                elif chunk_id == b'data':
+                    # Streaming writers may leave a placeholder size; trust the file
+                    data_size = min(chunk_size, file_size - offset - 8)
+                    return data_size / byte_rate if byte_rate else None
+                offset += 8 + chunk_size + (chunk_size & 1)
+    except (OSError, struct.error) as e:
+        logger.debug(f"Could not read WAV header from {path}: {e}")
+    
+    return None
 
 
 class VideoProductionAgent:
@@ -485,17 +728,16 @@ class VideoProductionAgent:
             logger.info(f"Video rendered successfully: {output_path}")
             
             # Get video info
-            info_result = subprocess.run(
-                ['ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams', str(output_path)],
-                capture_output=True,
-                text=True
-            )
+            info = read_mp4_info(output_path)
             
-            if info_result.returncode == 0:
-                info = json.loads(info_result.stdout)
-                duration = float(info.get('format', {}).get('duration', 0))
-                size_mb = int(info.get('format', {}).get('size', 0)) / (1024 * 1024)
-                logger.info(f"Video duration: {duration:.1f}s, size: {size_mb:.1f}MB")
+            if info:
+                size_mb = info.size_bytes / (1024 * 1024)
+                logger.info(f"Video duration: {info.duration_seconds:.1f}s, size: {size_mb:.1f}MB")
+                for stream in info.streams:
+                    logger.info(
+                        f"  {stream.kind} ({stream.codec}): {stream.duration_seconds:.2f}s, "
+                        f"{stream.sample_count} samples, {stream.size_bytes / (1024 * 1024):.1f}MB"
+                    )
             
             return output_path
             
@@ -504,6 +746,118 @@ class VideoProductionAgent:
             logger.error(f"stderr: {e.stderr}")
             raise
     
+    def verify_output(
+        self,
+        output_path: Path,
+        planned_duration: Optional[float] = None,
+        narration_path: Optional[Path] = None
+    ) -> List[str]:
+        """
+        Verify a rendered video against its planned scene timeline
+        
+        Args:
+            output_path: Rendered video path
+            planned_duration: Sum of scene durations, if known
+            narration_path: Narration WAV the video was rendered from, if known
+            
+        Returns:
+            List of issues found (empty if the output looks correct)
+        """
+        info = read_mp4_info(output_path)
+        if not info:
+            return ["Unreadable output: missing file, truncated/damaged boxes or no moov box (render incomplete?)"]
+        
+        issues = []
+        sample_bytes = sum(stream.size_bytes for stream in info.streams)
+        if sample_bytes > info.mdat_bytes:
+            issues.append(
+                f"Truncated media data: streams reference {sample_bytes} bytes, "
+                f"mdat holds {info.mdat_bytes}"
+            )
+        
+        video = info.stream('video')
+        audio = info.stream('audio')
+        
+        if not video:
+            issues.append("Missing video stream")
+        if not audio:
+            issues.append("Missing audio stream")
+        
+        if video and audio:
+            drift = video.duration_seconds - audio.duration_seconds
+            if abs(drift) > SYNC_TOLERANCE_SECONDS:
+                issues.append(
+                    f"Audio/video desync: video {video.duration_seconds:.2f}s, "
+                    f"audio {audio.duration_seconds:.2f}s ({drift:+.2f}s)"
+                )
+        
+        if planned_duration:
+            streams = [stream for stream in (video, audio) if stream]
+            shortest = min(streams, key=lambda stream: stream.duration_seconds, default=None)
+            rendered = shortest.duration_seconds if shortest else info.duration_seconds
+            if rendered < planned_duration - SYNC_TOLERANCE_SECONDS:
+                issues.append(
+                    f"Truncated: {rendered:.2f}s rendered of {planned_duration:.2f}s planned "
+                    f"(shortest stream: {shortest.kind if shortest else 'none'}, cut by -shortest?)"
+                )
+        
+        narration_duration = read_wav_duration(narration_path) if narration_path else None
+        if audio and narration_duration:
+            if narration_duration - audio.duration_seconds > SYNC_TOLERANCE_SECONDS:
+                issues.append(
+                    f"Narration cut: audio stream {audio.duration_seconds:.2f}s of "
+                    f"{narration_duration:.2f}s narration (cut by -shortest?)"
+                )
+        
+        return issues
+    
+    def verify_catalogue(self) -> int:
+        """
+        Verify every rendered MP4 in the output directory
+        
+        Planned durations are taken from the matching scripts and narration
+        durations from the matching audio files when available; outputs without
+        them are still checked for stream desync and truncated data.
+        
+        Returns:
+            Number of videos with issues
+        """
+        logger.info("\n" + "=" * 80)
+        logger.info("VIDEO OUTPUT VERIFICATION")
+        logger.info("=" * 80)
+        
+        planned = {}
+        for script_path in self.scan_scripts():
+            try:
+                scenes = self.parse_script(script_path)
+            except Exception as e:
+                logger.warning(f"Could not parse {script_path.name}: {e}")
+                continue
+            planned[f"{script_path.stem}_video"] = sum(scene.duration_seconds for scene in scenes)
+        
+        video_paths = sorted(self.video_out_dir.glob('*.mp4'))
+        audio_dir = self.video_out_dir / 'audio'
+        failed = 0
+        
+        for video_path in video_paths:
+            issues = self.verify_output(
+                video_path,
+                planned.get(video_path.stem),
+                audio_dir / f"{video_path.stem}_audio.wav"
+            )
+            if issues:
+                failed += 1
+                logger.warning(f"  ✗ {video_path.name}")
+                for issue in issues:
+                    logger.warning(f"    {issue}")
+            else:
+                logger.debug(f"  ✓ {video_path.name}")
+        
+        logger.info(f"Videos verified: {len(video_paths)}")
+        logger.info(f"Videos with issues: {failed}")
+        
+        return failed
+    
     def generate_render_log(self, job: VideoJob) -> Path:
         """
         Generate a render log for the video job
@@ -540,6 +894,13 @@ Scenes:
             if scene.visual_notes:
                 log_content += f"   Visuals: {scene.visual_notes}\n"
         
+        log_content += f"\nVerification:\n"
+        if job.verification_issues:
+            for issue in job.verification_issues:
+                log_content += f"- {issue}\n"
+        else:
+            log_content += "- OK\n"
+        
         if job.fallbacks_used:
             log_content += f"\nFallbacks Used:\n"
             for fallback in job.fallbacks_used:
@@ -588,7 +949,14 @@ Scenes:
             # Step 4: Render video
             self.render_video(job.scenes, job.audio_path, visual_assets, job.output_path)
             
-            # Step 5: Generate log
+            # Step 5: Verify output against the planned timeline
+            job.verification_issues = self.verify_output(
+                job.output_path, job.total_duration, job.audio_path
+            )
+            for issue in job.verification_issues:
+                logger.warning(f"Verification: {issue}")
+            
+            # Step 6: Generate log
             self.generate_render_log(job)
             
             logger.info(f"\n✓ Successfully generated video: {job.output_path}")
@@ -637,6 +1005,8 @@ Scenes:
             logger.info(f"    Duration: {job.total_duration:.1f}s")
             if job.fallbacks_used:
                 logger.info(f"    Fallbacks: {', '.join(job.fallbacks_used)}")
+            if job.verification_issues:
+                logger.info(f"    Verification: {'; '.join(job.verification_issues)}")
         
         logger.info("\n" + "=" * 80)
         logger.info("EXECUTION COMPLETE")
@@ -647,6 +1017,8 @@ def main():
     """Entry point"""
     try:
         agent = VideoProductionAgent()
+        if '--verify' in sys.argv[1:]:
+            return 1 if agent.verify_catalogue() else 0
         agent.run()
         return 0
     except Exception as e: